@@ -0,0 +1,253 @@
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import models
+
+# Statuses for which a trade's net premium is final.
+RESOLVED_STATUSES = ["Closed", "Rolled", "Expired"]
+
+# Upper bounds (inclusive) of the days-to-expiration buckets.
+DTE_BUCKETS = [7, 14, 30, 45, 60]
+
+MAX_WORKERS = 2
+MAX_RETAINED_JOBS = 256
+
+# --- Data version ---
+# Bumped whenever a commit touches the trades table, so cached results can be
+# keyed by the state of the data they were computed from. The counter lives in
+# this process only, so writes from other processes are not seen.
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+def get_data_version():
+    return _data_version
+
+@event.listens_for(Session, "after_flush")
+def _mark_trades_changed(session, flush_context):
+    if any(isinstance(obj, models.Trade) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["trades_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _bump_data_version(session):
+    # Only bump once the write is visible to other connections
+    global _data_version
+    if session.info.pop("trades_changed", False):
+        with _data_version_lock:
+            _data_version += 1
+
+@event.listens_for(Session, "after_rollback")
+def _clear_trades_changed(session):
+    session.info.pop("trades_changed", None)
+
+# --- Analyses ---
+def _dte_bucket(trade):
+    if trade.expiration_date is None or trade.transaction_date is None:
+        return "unknown"
+    dte = (trade.expiration_date - trade.transaction_date).days
+    lower = 0
+    for upper in DTE_BUCKETS:
+        if dte <= upper:
+            return f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+def _group_key(trade, group_by):
+    if group_by == "dte":
+        return _dte_bucket(trade)
+    if group_by == "trade_type":
+        return trade.trade_type
+    return trade.underlying_ticker
+
+def _sorted_groups(groups, group_by):
+    if group_by == "dte":
+        # Order buckets by their lower bound rather than as strings, with "unknown" last
+        def key(item):
+            label = item[0]
+            return (1, 0) if label == "unknown" else (0, int(label.split("-")[0].rstrip("+")))
+    else:
+        def key(item):
+            return item[0]
+    return dict(sorted(groups.items(), key=key))
+
+def win_rate(db: Session, group_by="ticker"):
+    trades = db.query(models.Trade).filter(models.Trade.status.in_(RESOLVED_STATUSES)).all()
+
+    groups = defaultdict(lambda: {"trades": 0, "wins": 0, "net_premium": 0.0})
+    for trade in trades:
+        group = groups[_group_key(trade, group_by)]
+        group["trades"] += 1
+        if (trade.net_premium_received or 0) > 0:
+            group["wins"] += 1
+        group["net_premium"] += trade.net_premium_received or 0
+
+    for group in groups.values():
+        group["win_rate"] = (group["wins"] / group["trades"]) * 100 if group["trades"] > 0 else 0
+
+    return {"group_by": group_by, "groups": _sorted_groups(groups, group_by)}
+
+def roll_effectiveness(db: Session, group_by="ticker"):
+    trades = db.query(models.Trade).all()
+    children = {trade.rolled_from_id: trade for trade in trades if trade.rolled_from_id is not None}
+
+    groups = defaultdict(lambda: {"chains": 0, "rolls": 0, "resolved_chains": 0, "winning_chains": 0, "net_premium": 0.0})
+    for trade in trades:
+        # Only walk from the first leg of each chain that was rolled at least once
+        if trade.rolled_from_id is not None or trade.id not in children:
+            continue
+
+        legs = [trade]
+        while legs[-1].id in children:
+            legs.append(children[legs[-1].id])
+
+        chain_premium = sum(leg.net_premium_received or 0 for leg in legs)
+        group = groups[_group_key(trade, group_by)]
+        group["chains"] += 1
+        group["rolls"] += len(legs) - 1
+        group["net_premium"] += chain_premium
+        if legs[-1].status != "Open":
+            group["resolved_chains"] += 1
+            if chain_premium > 0:
+                group["winning_chains"] += 1
+
+    for group in groups.values():
+        resolved = group["resolved_chains"]
+        group["win_rate"] = (group["winning_chains"] / resolved) * 100 if resolved > 0 else 0
+        group["average_rolls"] = group["rolls"] / group["chains"]
+
+    return {"group_by": group_by, "groups": _sorted_groups(groups, group_by)}
+
+def premium_yield(db: Session, group_by="ticker"):
+    trades = db.query(models.Trade).filter(models.Trade.status.in_(RESOLVED_STATUSES)).all()
+
+    groups = defaultdict(lambda: {"trades": 0, "net_premium": 0.0, "collateral": 0.0, "collateral_days": 0.0})
+    for trade in trades:
+        collateral = (trade.strike_price or 0) * (trade.number_of_contracts or 0) * 100
+        end_date = trade.buy_back_date or trade.expiration_date
+        days_held = max((end_date - trade.transaction_date).days, 1) if end_date and trade.transaction_date else 1
+
+        group = groups[_group_key(trade, group_by)]
+        group["trades"] += 1
+        group["net_premium"] += trade.net_premium_received or 0
+        group["collateral"] += collateral
+        group["collateral_days"] += collateral * days_held
+
+    for group in groups.values():
+        group["yield_pct"] = (group["net_premium"] / group["collateral"]) * 100 if group["collateral"] > 0 else 0
+        group["annualized_yield_pct"] = (group["net_premium"] / group["collateral_days"]) * 365 * 100 if group["collateral_days"] > 0 else 0
+        del group["collateral_days"]
+
+    return {"group_by": group_by, "groups": _sorted_groups(groups, group_by)}
+
+ANALYSES = {
+    "win_rate": win_rate,
+    "roll_effectiveness": roll_effectiveness,
+    "premium_yield": premium_yield,
+}
+
+# --- Job queue ---
+class AnalyticsJobQueue:
+    """Runs analyses on a background thread pool and caches results by data version."""
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._max_workers = max_workers
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._cache = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="analytics")
+        return self._executor
+
+    def submit(self, bind, analysis, group_by):
+        """Queues an analysis against the database at `bind` and returns its job."""
+        version = get_data_version()
+        key = (analysis, group_by, version)
+
+        with self._lock:
+            if key in self._in_flight:
+                return dict(self._jobs[self._in_flight[key]])
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "analysis": analysis,
+                "group_by": group_by,
+                "data_version": version,
+                "status": "pending",
+                "cached": False,
+                "result": None,
+                "error": None,
+            }
+            if key in self._cache:
+                job.update(status="completed", cached=True, result=self._cache[key])
+            else:
+                self._in_flight[key] = job["job_id"]
+            self._store(job)
+
+        if job["status"] == "pending":
+            self._get_executor().submit(self._run, job["job_id"], bind, key)
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+        # Cancelled jobs will never run, so fail them rather than leave them pending.
+        # Running jobs are left to finish on their worker thread.
+        with self._lock:
+            for key, job_id in list(self._in_flight.items()):
+                job = self._jobs[job_id]
+                if job["status"] == "pending":
+                    job.update(status="failed", error="Analytics queue shut down before the job started")
+                    del self._in_flight[key]
+
+    def _store(self, job):
+        self._jobs[job["job_id"]] = job
+        while len(self._jobs) > MAX_RETAINED_JOBS:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id]["status"] in ("pending", "running"):
+                break
+            self._jobs.popitem(last=False)
+
+    def _run(self, job_id, bind, key):
+        analysis, group_by, version = key
+        with self._lock:
+            if self._in_flight.get(key) != job_id:
+                return  # Failed by shutdown() before it started
+            self._jobs[job_id]["status"] = "running"
+
+        db = Session(bind=bind)
+        try:
+            result = ANALYSES[analysis](db, group_by)
+        except Exception as e:
+            self._finish(job_id, key, status="failed", error=str(e))
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            # Results for older data versions can never be served again
+            for cached_key in [k for k in self._cache if k[2] < version]:
+                del self._cache[cached_key]
+            self._cache[key] = result
+        self._finish(job_id, key, status="completed", result=result)
+
+    def _finish(self, job_id, key, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+            del self._in_flight[key]
+
+job_queue = AnalyticsJobQueue()
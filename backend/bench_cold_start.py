@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Runs in a fresh interpreter so every measurement is a true cold start
+CHILD_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    response = client.get("/api/dashboard/")
+    first_request = time.perf_counter()
+assert response.status_code == 200, response.text
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_request_ms": (first_request - start) * 1000}))
+"""
+
+def measure(runs):
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp_dir, 'trades.db')}")
+            output = subprocess.run(
+                [sys.executable, "-c", CHILD_SCRIPT],
+                cwd=backend_dir, env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure `import main` and time to first request.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    for key in ("import_ms", "first_request_ms"):
+        values = [result[key] for result in results]
+        print(f"{key:>18}: median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}")
+
+if __name__ == "__main__":
+    main()
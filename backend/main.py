@@ -1,16 +1,25 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List
 from sqlalchemy import func
 
+import analytics
+import migrations
 import models
 import schemas
-from models import SessionLocal, create_db_and_tables
+from models import SessionLocal, get_engine
 
-create_db_and_tables()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect and migrate on startup rather than at import time
+    migrations.run_migrations(get_engine())
+    yield
+    analytics.job_queue.shutdown()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -28,7 +37,7 @@ app.add_middleware(
 
 # Dependency
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
@@ -241,8 +250,14 @@ def get_dashboard_data(db: Session = Depends(get_db)):
         "win_rate": win_rate
     }
 
-@app.post("/api/analyze")
-def analyze_trades(trades: List[schemas.Trade]):
-    # Placeholder for Gemini API call
-    analysis = "Gemini analysis: Based on your trade history, you are doing great!"
-    return {"analysis": analysis}
\ No newline at end of file
+@app.post("/api/analyze", response_model=schemas.AnalysisJob, status_code=202)
+def submit_analysis(job: schemas.AnalysisJobCreate, db: Session = Depends(get_db)):
+    # The job opens its own session on the same engine, so it outlives this request
+    return analytics.job_queue.submit(db.get_bind(), job.analysis, job.group_by)
+
+@app.get("/api/analyze/{job_id}", response_model=schemas.AnalysisJob)
+def get_analysis(job_id: str):
+    job = analytics.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, text
+
+import models
+
+# Ordered schema migrations. Each step is (version, description, statements) and
+# is applied at most once; the current version is kept in SQLite's user_version.
+# Append new steps here instead of rebuilding the database.
+MIGRATIONS = [
+    (1, "Add indexes for ticker/date, status and roll lookups", [
+        "CREATE INDEX IF NOT EXISTS ix_trades_ticker_transaction_date ON trades (underlying_ticker, transaction_date)",
+        "CREATE INDEX IF NOT EXISTS ix_trades_status ON trades (status)",
+        "CREATE INDEX IF NOT EXISTS ix_trades_rolled_from_id ON trades (rolled_from_id)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def get_schema_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+def _set_schema_version(conn, version):
+    # PRAGMA does not accept bound parameters
+    conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+
+@contextmanager
+def _transaction(engine):
+    """Runs a block in a real SQLite transaction, including DDL and PRAGMAs.
+
+    pysqlite only opens transactions implicitly before DML, so DDL run through
+    engine.begin() is committed statement by statement. Switching the driver
+    to autocommit mode and issuing BEGIN/COMMIT ourselves makes each step atomic.
+    BEGIN IMMEDIATE takes the write lock up front, so processes migrating the
+    same database run one step at a time.
+    """
+    with engine.connect() as conn:
+        dbapi_connection = conn.connection.dbapi_connection
+        isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        finally:
+            dbapi_connection.isolation_level = isolation_level
+
+def run_migrations(engine):
+    """Brings the database at `engine` up to LATEST_VERSION and returns the versions applied."""
+    with _transaction(engine) as conn:
+        # A brand new database gets the current schema directly
+        if get_schema_version(conn) == 0 and not inspect(conn).has_table(models.Trade.__tablename__):
+            models.Base.metadata.create_all(bind=conn)
+            _set_schema_version(conn, LATEST_VERSION)
+            return []
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        with _transaction(engine) as conn:
+            # Re-read under the write lock in case another process applied this step
+            if get_schema_version(conn) >= version:
+                continue
+            for statement in statements:
+                conn.execute(text(statement))
+            _set_schema_version(conn, version)
+        applied.append(version)
+    return applied
+
+if __name__ == "__main__":
+    applied = run_migrations(models.get_engine())
+    print(f"Database is at schema version {LATEST_VERSION} ({len(applied)} migration(s) applied).")
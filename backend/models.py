@@ -1,14 +1,32 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, ForeignKey, Boolean
+import os
+
+from sqlalchemy import create_engine, Column, Integer, String, Float, Date, ForeignKey, Boolean, Index
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
 
-DATABASE_URL = "sqlite:////root/options_wheel_tracker/trades.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:////root/options_wheel_tracker/trades.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The engine is created on first use so that importing this module never touches the database
+_engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
+def get_engine():
+    if _engine is None:
+        set_engine(create_engine(DATABASE_URL, connect_args={"check_same_thread": False}))
+    return _engine
+
+def set_engine(engine):
+    global _engine
+    _engine = engine
+    SessionLocal.configure(bind=engine)
+
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        Index("ix_trades_ticker_transaction_date", "underlying_ticker", "transaction_date"),
+        Index("ix_trades_status", "status"),
+        Index("ix_trades_rolled_from_id", "rolled_from_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     underlying_ticker = Column(String, index=True)
@@ -33,7 +51,3 @@ class Trade(Base):
 
     # This is the child trade
     rolled_to = relationship("Trade", uselist=False, back_populates="rolled_from")
-
-def create_db_and_tables():
-    Base.metadata.create_all(bind=engine)
-
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import date
-from typing import Optional
+from typing import Any, Dict, Literal, Optional
 
 class TradeBase(BaseModel):
     underlying_ticker: str
@@ -66,3 +66,17 @@ class TradeRoll(BaseModel):
 
 class CumulativePnl(BaseModel):
     cumulative_pnl: float
+
+class AnalysisJobCreate(BaseModel):
+    analysis: Literal["win_rate", "roll_effectiveness", "premium_yield"]
+    group_by: Literal["ticker", "dte", "trade_type"] = "ticker"
+
+class AnalysisJob(BaseModel):
+    job_id: str
+    analysis: str
+    group_by: str
+    data_version: int
+    status: str
+    cached: bool
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
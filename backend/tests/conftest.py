@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+import models
 from main import app, get_db
 from models import Base
 
@@ -16,6 +17,9 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Make the app's lifespan hook migrate the test database instead of the real one
+models.set_engine(engine)
+
 Base.metadata.create_all(bind=engine)
 
 def override_get_db():
@@ -0,0 +1,173 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy.orm import Session
+from fastapi.testclient import TestClient
+
+import analytics
+import models
+from main import app
+
+client = TestClient(app)
+
+def _new_trade(ticker, expiration_date, premium_received, strike_price=100, fees=0.0):
+    response = client.post("/api/trades/", json={
+        "underlying_ticker": ticker,
+        "trade_type": "Sell Put",
+        "expiration_date": expiration_date,
+        "strike_price": strike_price,
+        "premium_received": premium_received,
+        "number_of_contracts": 1,
+        "transaction_date": "2025-01-01",
+        "fees": fees,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def _close(trade_id, buy_back_price, buy_back_date="2025-01-10"):
+    response = client.put(f"/api/trades/{trade_id}/close", json={
+        "buy_back_price": buy_back_price,
+        "buy_back_date": buy_back_date,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def _run_analysis(analysis, group_by="ticker"):
+    response = client.post("/api/analyze", json={"analysis": analysis, "group_by": group_by})
+    assert response.status_code == 202
+    job = response.json()
+
+    deadline = time.monotonic() + 5
+    while job["status"] in ("pending", "running"):
+        assert time.monotonic() < deadline, "Analysis job did not finish in time"
+        time.sleep(0.01)
+        response = client.get(f"/api/analyze/{job['job_id']}")
+        assert response.status_code == 200
+        job = response.json()
+
+    assert job["status"] == "completed", job["error"]
+    return job
+
+def test_win_rate_by_ticker(db_session: Session):
+    _close(_new_trade("AAA", "2025-01-31", 1.0)["id"], 0.5)
+    _close(_new_trade("AAA", "2025-01-31", 1.0)["id"], 1.5)
+    _close(_new_trade("BBB", "2025-01-31", 2.0)["id"], 0.1)
+    _new_trade("BBB", "2025-01-31", 2.0)  # Still open, not counted
+
+    groups = _run_analysis("win_rate")["result"]["groups"]
+
+    assert groups["AAA"]["trades"] == 2
+    assert groups["AAA"]["win_rate"] == pytest.approx(50)
+    assert groups["BBB"]["trades"] == 1
+    assert groups["BBB"]["win_rate"] == pytest.approx(100)
+
+def test_win_rate_by_dte(db_session: Session):
+    _close(_new_trade("AAA", "2025-04-01", 1.0)["id"], 0.5)
+    _close(_new_trade("AAA", "2025-01-06", 1.0)["id"], 0.5, "2025-01-03")
+    _close(_new_trade("AAA", "2025-02-10", 1.0)["id"], 0.5)
+    _close(_new_trade("AAA", "2025-01-12", 1.0)["id"], 0.5)
+
+    groups = _run_analysis("win_rate", group_by="dte")["result"]["groups"]
+
+    assert list(groups) == ["0-7", "8-14", "31-45", "61+"]
+
+def test_roll_effectiveness(db_session: Session):
+    trade = _new_trade("AAA", "2025-01-31", 1.0)
+    response = client.post(f"/api/trades/{trade['id']}/roll", json={
+        "new_expiration_date": "2025-02-28",
+        "strike_price": 95,
+        "premium_received": 1.5,
+        "roll_date": "2025-01-20",
+    })
+    assert response.status_code == 200
+    _close(response.json()["id"], 0.2, "2025-02-15")
+
+    group = _run_analysis("roll_effectiveness")["result"]["groups"]["AAA"]
+
+    assert group["chains"] == 1
+    assert group["rolls"] == 1
+    assert group["winning_chains"] == 1
+    assert group["net_premium"] == pytest.approx(100 + 130)
+
+def test_premium_yield(db_session: Session):
+    _close(_new_trade("AAA", "2025-01-31", 1.0, strike_price=50)["id"], 0.0)
+
+    group = _run_analysis("premium_yield")["result"]["groups"]["AAA"]
+
+    assert group["collateral"] == pytest.approx(5000)
+    assert group["yield_pct"] == pytest.approx(2)
+
+def test_results_are_cached_until_data_changes(db_session: Session):
+    _close(_new_trade("AAA", "2025-01-31", 1.0)["id"], 0.5)
+
+    first = _run_analysis("win_rate")
+    second = _run_analysis("win_rate")
+    assert second["cached"] is True
+    assert second["data_version"] == first["data_version"]
+    assert second["result"] == first["result"]
+
+    _close(_new_trade("AAA", "2025-01-31", 1.0)["id"], 0.5)
+
+    third = _run_analysis("win_rate")
+    assert third["cached"] is False
+    assert third["result"]["groups"]["AAA"]["trades"] == 2
+
+def test_unknown_analysis_job():
+    response = client.get("/api/analyze/does-not-exist")
+    assert response.status_code == 404
+
+def test_unknown_analysis_type():
+    response = client.post("/api/analyze", json={"analysis": "astrology"})
+    assert response.status_code == 422
+
+def test_data_version_changes_only_on_commit(db_session: Session):
+    trade = models.Trade(underlying_ticker="AAA", trade_type="Sell Put", status="Open")
+    version = analytics.get_data_version()
+
+    db_session.add(trade)
+    db_session.flush()
+    assert analytics.get_data_version() == version
+    db_session.rollback()
+    assert analytics.get_data_version() == version
+
+    db_session.add(models.Trade(underlying_ticker="AAA", trade_type="Sell Put", status="Open"))
+    db_session.commit()
+    assert analytics.get_data_version() == version + 1
+
+def test_shutdown_fails_queued_jobs(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking(db, group_by):
+        started.set()
+        release.wait(5)
+        return {}
+
+    monkeypatch.setitem(analytics.ANALYSES, "blocking", blocking)
+    monkeypatch.setitem(analytics.ANALYSES, "quick", lambda db, group_by: {"ok": True})
+    queue = analytics.AnalyticsJobQueue(max_workers=1)
+
+    running = queue.submit(None, "blocking", "ticker")
+    assert started.wait(5)
+    queued = queue.submit(None, "quick", "ticker")
+    queue.shutdown()
+    release.set()
+
+    assert queue.get(queued["job_id"])["status"] == "failed"
+
+    # The job that was already running finishes normally
+    deadline = time.monotonic() + 5
+    while queue.get(running["job_id"])["status"] != "completed":
+        assert time.monotonic() < deadline, "Analysis job did not finish in time"
+        time.sleep(0.01)
+    assert queue.get(running["job_id"])["error"] is None
+
+    # Resubmitting after a restart runs a fresh job instead of the dead one
+    resubmitted = queue.submit(None, "quick", "ticker")
+    assert resubmitted["job_id"] != queued["job_id"]
+    deadline = time.monotonic() + 5
+    while queue.get(resubmitted["job_id"])["status"] != "completed":
+        assert time.monotonic() < deadline, "Analysis job did not finish in time"
+        time.sleep(0.01)
+    queue.shutdown()
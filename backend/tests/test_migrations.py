@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+import migrations
+from migrations import LATEST_VERSION, get_schema_version, run_migrations
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _index_names(engine):
+    return {index["name"] for index in inspect(engine).get_indexes("trades")}
+
+def test_new_database_is_created_at_latest_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trades.db'}")
+
+    assert run_migrations(engine) == []
+
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == LATEST_VERSION
+    assert "ix_trades_status" in _index_names(engine)
+
+def test_existing_database_gets_pending_migrations_only(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trades.db'}")
+    with engine.begin() as conn:
+        # Schema as created before migrations existed
+        conn.execute(text(
+            "CREATE TABLE trades (id INTEGER PRIMARY KEY, underlying_ticker VARCHAR, trade_type VARCHAR, "
+            "expiration_date DATE, strike_price FLOAT, premium_received FLOAT, number_of_contracts INTEGER, "
+            "transaction_date DATE, status VARCHAR, buy_back_price FLOAT, buy_back_date DATE, "
+            "net_premium_received FLOAT, fees FLOAT, closing_fees FLOAT, stock_pnl FLOAT, assigned BOOLEAN, "
+            "rolled_from_id INTEGER REFERENCES trades (id))"
+        ))
+        conn.execute(text("INSERT INTO trades (id, underlying_ticker, status) VALUES (1, 'AAA', 'Open')"))
+
+    assert run_migrations(engine) == list(range(1, LATEST_VERSION + 1))
+    assert run_migrations(engine) == []
+
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == LATEST_VERSION
+        assert conn.execute(text("SELECT COUNT(*) FROM trades")).scalar() == 1
+    assert "ix_trades_ticker_transaction_date" in _index_names(engine)
+
+def test_importing_main_does_not_touch_the_database(tmp_path):
+    db_path = tmp_path / "trades.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+
+    subprocess.run([sys.executable, "-c", "import main"], cwd=BACKEND_DIR, env=env, check=True)
+
+    assert not db_path.exists()
+
+def test_failed_step_leaves_no_partial_changes(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trades.db'}")
+    run_migrations(engine)
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [
+        (LATEST_VERSION + 1, "Add a column, then fail", [
+            "ALTER TABLE trades ADD COLUMN notes VARCHAR",
+            "CREATE INDEX ix_broken ON missing_table (id)",
+        ]),
+    ])
+
+    with pytest.raises(OperationalError):
+        run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == LATEST_VERSION
+    assert "notes" not in {column["name"] for column in inspect(engine).get_columns("trades")}
+
+def test_concurrent_runs_apply_each_step_once(tmp_path, monkeypatch):
+    db_url = f"sqlite:///{tmp_path / 'trades.db'}"
+    run_migrations(create_engine(db_url))
+
+    # A new step that fails if it is applied twice
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [
+        (LATEST_VERSION + 1, "Add a column", ["ALTER TABLE trades ADD COLUMN notes VARCHAR"]),
+    ])
+
+    barrier = threading.Barrier(4)
+    results = []
+    errors = []
+
+    def run():
+        runner_engine = create_engine(db_url)
+        barrier.wait()
+        try:
+            results.append(run_migrations(runner_engine))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(results) == [[], [], [], [LATEST_VERSION + 1]]